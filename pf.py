@@ -1,14 +1,13 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from datetime import date, datetime
+from datetime import date
 import calendar
 import base64
 import io
-from matplotlib import pyplot as plt
-import seaborn as sns
-from st_aggrid import AgGrid, GridOptionsBuilder
-import math
+import uuid
+from collections import namedtuple
+from functools import lru_cache
 from dateutil.relativedelta import relativedelta
 
 # Initialize page config
@@ -50,11 +49,31 @@ This application calculates your projected PF corpus at retirement based on:
 - Pay commission revisions in 2030 and 2040
 """)
 
-def round_up_to_10(value):
-    return math.ceil(value / 10) * 10
+# Numeric ledger columns, in the order they appear in the projection
+NUMERIC_COLS = ['Basic', 'DA', 'PF_Pay', 'Own_Contribution', 'Company_Contribution',
+                'EPFO_Outflow_Contribution', 'Own_Opening_Balance', 'Own_Monthly_Interest',
+                'Own_Closing_Balance', 'Company_Opening_Balance', 'Company_Monthly_Interest',
+                'Company_Closing_Balance', 'EPFO_Opening_Balance', 'EPFO_Monthly_Interest',
+                'EPFO_Closing_Balance', 'Total_Corpus']
+# Set of the same columns, for membership checks when formatting money columns
+MONEY_COLS = frozenset(NUMERIC_COLS)
 
-def calculate_age_and_retirement_date(dob):
-    today = date.today()
+# Monthly ledger columns - keep only what's needed for display
+DISPLAY_COLS = ['Month_Year', 'Basic', 'DA', 'PF_Pay', 'Own_Contribution',
+                'Company_Contribution', 'Own_Opening_Balance', 'Own_Monthly_Interest',
+                'Own_Closing_Balance', 'Company_Opening_Balance', 'Company_Monthly_Interest',
+                'Company_Closing_Balance', 'Total_Corpus', 'Event']
+# The Excel download adds the EPFO columns after the ledger columns
+_EXCEL_COL_ORDER = tuple(dict.fromkeys([*DISPLAY_COLS, 'EPFO_Outflow_Contribution', 'EPFO_Opening_Balance',
+                                        'EPFO_Monthly_Interest', 'EPFO_Closing_Balance']))
+
+def round_columns_up_to_10(df, columns):
+    """Round the given columns (where present) up to the next multiple of 10, in place"""
+    columns = [col for col in columns if col in df.columns]
+    values = df[columns].to_numpy(dtype=np.float64)
+    df[columns] = (np.ceil(values / 10) * 10).astype(np.int64)
+
+def calculate_age_and_retirement_date(dob, today):
     retirement_age = 60
     retirement_date = date(dob.year + retirement_age, dob.month, dob.day)
     
@@ -69,6 +88,8 @@ if 'calculated' not in st.session_state:
     st.session_state.calculated = False
 if 'projection_df' not in st.session_state:
     st.session_state.projection_df = None
+if 'projection_id' not in st.session_state:
+    st.session_state.projection_id = None
 
 # Input form
 with st.form("input_form"):
@@ -154,286 +175,239 @@ with st.form("input_form"):
         
 
     calculate_button = st.form_submit_button("Calculate Retirement Corpus")
+@st.cache_data(show_spinner=False, max_entries=64)
 def create_monthly_projection(dob, current_basic, current_da, current_own_pf, current_company_pf,
                             increment_month, own_pf_percent, company_pf_percent, pf_interest_rate,
-                            pc_2030_factor, pc_2040_factor, current_epfo_balance,promotion_details=[]):
-    """Calculate monthly PF projection with promotions, increments, and pay commissions"""
+                            pc_2030_factor, pc_2040_factor, current_epfo_balance, today, promotion_details=[]):
+    """Calculate monthly PF projection with promotions, increments, and pay commissions
+    
+    today is passed in by the caller so the cached projection is keyed on the current date;
+    max_entries evicts the entries left behind by earlier days.
+    """
     
     # Calculate retirement date
-    current_age, retirement_date = calculate_age_and_retirement_date(dob)
+    current_age, retirement_date = calculate_age_and_retirement_date(dob, today)
     if not retirement_date:
         st.error("Retirement date is in the past. Please check your date of birth.")
         return None
 
     # Start from the current month
-    current_date = date.today().replace(day=1)
+    current_date = today.replace(day=1)
     end_date = retirement_date.replace(day=1)
     first_year = current_date.year
 
-    # Initialize dataframe
-    date_range = pd.date_range(start=current_date, end=end_date, freq='MS')
-    df = pd.DataFrame(index=date_range)
-
-    # Initialize columns
-    df['Month_Year'] = df.index.strftime('%b-%Y')
-    df['Basic'] = 0.0
-    df['DA'] = 0.0
-    df['PF_Pay'] = 0.0
-    df['Own_Contribution'] = 0.0
-    df['Company_Contribution'] = 0.0
-    df['EPFO_Outflow_Contribution'] = 0.0
-    df['Own_Opening_Balance'] = 0.0
-    df['Own_Monthly_Interest'] = 0.0
-    df['Own_Closing_Balance'] = 0.0
-    df['Company_Opening_Balance'] = 0.0
-    df['Company_Monthly_Interest'] = 0.0
-    df['Company_Closing_Balance'] = 0.0
-    df['EPFO_Opening_Balance'] = 0.0
-    df['EPFO_Monthly_Interest'] = 0.0
-    df['EPFO_Closing_Balance'] = 0.0
-    df['Total_Corpus'] = 0.0
-    df['Event'] = ""
-    df['Financial_Year'] = df.index.strftime('%Y') + "-" + (df.index + pd.DateOffset(years=1)).strftime('%y')
-
-    # Set initial values
-    df.loc[df.index[0], 'Basic'] = current_basic
-    df.loc[df.index[0], 'DA'] = current_da
-    df.loc[df.index[0], 'Own_Opening_Balance'] = current_own_pf
-    df.loc[df.index[0], 'Company_Opening_Balance'] = current_company_pf
-    df.loc[df.index[0], 'PF_Pay'] = df.loc[df.index[0], 'Basic'] + df.loc[df.index[0], 'DA']
-    df.loc[df.index[0], 'Own_Contribution'] = df.loc[df.index[0], 'PF_Pay'] * (own_pf_percent / 100)
-    df.loc[df.index[0], 'Company_Contribution'] = df.loc[df.index[0], 'PF_Pay'] * (company_pf_percent / 100)
-    df.loc[df.index[0], 'EPFO_Opening_Balance'] = current_epfo_balance
-    # Calculate initial EPFO Outflow Contribution
-    pf_pay = df.loc[df.index[0], 'PF_Pay']
-    if pf_pay <= 15000:
-        df.loc[df.index[0], 'EPFO_Outflow_Contribution'] = pf_pay * 0.0833  # 8.33% of PF Pay
-        
-    else:
-        df.loc[df.index[0], 'EPFO_Outflow_Contribution'] = (pf_pay * 0.0833) + ((pf_pay - 15000) * 0.0116) - 1250
-        
+    # Month grid for the projection, as month offsets from the current month
+    n = (end_date.year - first_year) * 12 + (end_date.month - current_date.month) + 1
+    year_offset, month_offset = np.divmod(current_date.month - 1 + np.arange(n), 12)
+    years = first_year + year_offset
+    months = month_offset + 1
+    date_range = pd.date_range(start=current_date, periods=n, freq='MS')
 
     monthly_interest_rate = pf_interest_rate / (12 * 100)
     current_da_percentage = current_da / current_basic if current_basic > 0 else 0
-    
-    for i in range(len(df)):
-        month = df.index[i].month
-        year = df.index[i].year
-        
-        # Carry forward balances from previous month (except first month)
-        if i > 0:
-            df.loc[df.index[i], 'Basic'] = df.loc[df.index[i-1], 'Basic']
-            df.loc[df.index[i], 'DA'] = df.loc[df.index[i-1], 'DA']
-            df.loc[df.index[i], 'Own_Opening_Balance'] = df.loc[df.index[i-1], 'Own_Closing_Balance']
-            df.loc[df.index[i], 'Company_Opening_Balance'] = df.loc[df.index[i-1], 'Company_Closing_Balance']
-            df.loc[df.index[i], 'EPFO_Opening_Balance'] = df.loc[df.index[i-1], 'EPFO_Closing_Balance']
-
-        # Check for promotions
-        promotion_applied = False
-        for promo in promotion_details:
-            if year == promo['year'] and month == promo['month']:
-                old_basic = df.loc[df.index[i], 'Basic']
-                df.loc[df.index[i], 'Basic'] = old_basic * promo['hike_percent']
-                df.loc[df.index[i], 'DA'] = df.loc[df.index[i], 'Basic'] * current_da_percentage
-                df.loc[df.index[i], 'Event'] = f"Promotion: Basic +{int((promo['hike_percent']-1)*100)}%"
-                promotion_applied = True
-                break
-
-        # Apply annual increment
-        if month == increment_month and not promotion_applied:
-            df.loc[df.index[i], 'Event'] = f"{df.loc[df.index[i], 'Event']} Annual 3% Increment".strip()
-            previous_basic = df.loc[df.index[i], 'Basic']
-            df.loc[df.index[i], 'Basic'] = previous_basic * 1.03
-            
-            if year == first_year:
-                df.loc[df.index[i], 'DA'] = df.loc[df.index[i], 'DA'] + (previous_basic * 0.04)
-                current_da_percentage = df.loc[df.index[i], 'DA'] / df.loc[df.index[i], 'Basic']
-            else:
-                df.loc[df.index[i], 'DA'] = df.loc[df.index[i], 'Basic'] * current_da_percentage
-
-        # Apply DA hikes in January
-        if month == 1:
-            if year < 2030:
-                current_da_percentage += 0.04
-                df.loc[df.index[i], 'DA'] = df.loc[df.index[i], 'Basic'] * current_da_percentage
-                df.loc[df.index[i], 'Event'] = f"{df.loc[df.index[i], 'Event']} Annual DA Revision (4% of Basic)".strip()
-            elif year == 2030:
-                current_da_percentage = 0.0
-                df.loc[df.index[i], 'DA'] = 0
-                df.loc[df.index[i], 'Event'] = f"{df.loc[df.index[i], 'Event']} Pay Commission 2030, DA Reset".strip()
-                df.loc[df.index[i], 'Basic'] = df.loc[df.index[i], 'Basic'] * pc_2030_factor * (1.03 ** 3)
-            elif 2031 <= year <= 2039:
-                current_da_percentage += 0.02
-                df.loc[df.index[i], 'DA'] = df.loc[df.index[i], 'Basic'] * current_da_percentage
-                df.loc[df.index[i], 'Event'] = f"{df.loc[df.index[i], 'Event']} Annual DA Revision (2% of Basic)".strip()
-            elif year == 2040:
-                current_da_percentage = 0.0
-                df.loc[df.index[i], 'DA'] = 0
-                df.loc[df.index[i], 'Event'] = f"{df.loc[df.index[i], 'Event']} Pay Commission 2040, DA Reset".strip()
-                df.loc[df.index[i], 'Basic'] = df.loc[df.index[i], 'Basic'] * pc_2040_factor * (1.03 ** 3)
-            elif year >= 2041:
-                current_da_percentage += 0.01
-                df.loc[df.index[i], 'DA'] = df.loc[df.index[i], 'Basic'] * current_da_percentage
-                df.loc[df.index[i], 'Event'] = f"{df.loc[df.index[i], 'Event']} Annual DA Revision (1% of Basic)".strip()
-
-        # Calculate PF Pay and contributions
-        df.loc[df.index[i], 'PF_Pay'] = df.loc[df.index[i], 'Basic'] + df.loc[df.index[i], 'DA']
-        df.loc[df.index[i], 'Own_Contribution'] = df.loc[df.index[i], 'PF_Pay'] * (own_pf_percent / 100)
-        df.loc[df.index[i], 'Company_Contribution'] = df.loc[df.index[i], 'PF_Pay'] * (company_pf_percent / 100)
-        
-        # Calculate EPFO Outflow Contribution
-        pf_pay = df.loc[df.index[i], 'PF_Pay']
-        if pf_pay <= 15000:
-            df.loc[df.index[i], 'EPFO_Outflow_Contribution'] = pf_pay * 0.0833
-            
-        else:
-            df.loc[df.index[i], 'EPFO_Outflow_Contribution'] = (pf_pay * 0.0833) + ((pf_pay - 15000) * 0.0116) - 1250
-            
 
-        # Calculate interest (special handling for March)
-        if month != 3:
-            if i > 0:
-                df.loc[df.index[i], 'Own_Monthly_Interest'] = df.loc[df.index[i-1], 'Own_Closing_Balance'] * monthly_interest_rate
-                df.loc[df.index[i], 'Company_Monthly_Interest'] = df.loc[df.index[i-1], 'Company_Closing_Balance'] * monthly_interest_rate
-                df.loc[df.index[i], 'EPFO_Monthly_Interest'] = df.loc[df.index[i-1], 'EPFO_Closing_Balance'] * monthly_interest_rate
-        else:
-            # March - calculate interest but don't add to current month's balance
-            if i > 0:
-                march_own_interest = df.loc[df.index[i-1], 'Own_Closing_Balance'] * monthly_interest_rate
-                march_company_interest = df.loc[df.index[i-1], 'Company_Closing_Balance'] * monthly_interest_rate
-                march_epfo_interest = df.loc[df.index[i-1], 'EPFO_Closing_Balance'] * monthly_interest_rate
-                
-                # Show zero interest for March
-                df.loc[df.index[i], 'Own_Monthly_Interest'] = 0
-                df.loc[df.index[i], 'Company_Monthly_Interest'] = 0
-                df.loc[df.index[i], 'EPFO_Monthly_Interest'] = 0
-                
-                # Add March interest to April's opening balance
-                if i+1 < len(df):  # If there is an April
-                    df.loc[df.index[i+1], 'Own_Opening_Balance'] += march_own_interest
-                    df.loc[df.index[i+1], 'Company_Opening_Balance'] += march_company_interest
-                    df.loc[df.index[i+1], 'EPFO_Opening_Balance'] += march_epfo_interest
-                    
-                    # Mark that this includes March interest
-                    if not df.loc[df.index[i+1], 'Event']:
-                        df.loc[df.index[i+1], 'Event'] = "Previous FY Interest Credited"
-                    else:
-                        df.loc[df.index[i+1], 'Event'] = f"{df.loc[df.index[i+1], 'Event']}, Previous FY Interest Credited"
-
-        # Calculate closing balances
-        if i == 0:
-            # First month calculation
-            df.loc[df.index[i], 'Own_Closing_Balance'] = (df.loc[df.index[i], 'Own_Opening_Balance'] +
-                                                        df.loc[df.index[i], 'Own_Contribution'] +
-                                                        df.loc[df.index[i], 'Own_Monthly_Interest'])
-
-            df.loc[df.index[i], 'Company_Closing_Balance'] = (df.loc[df.index[i], 'Company_Opening_Balance'] +
-                                                            df.loc[df.index[i], 'Company_Contribution'] +
-                                                            df.loc[df.index[i], 'Company_Monthly_Interest'])
-            
-            df.loc[df.index[i], 'EPFO_Closing_Balance'] = (df.loc[df.index[i], 'EPFO_Opening_Balance'] +
-                                                         df.loc[df.index[i], 'EPFO_Outflow_Contribution'] +
-                                                         df.loc[df.index[i], 'EPFO_Monthly_Interest'])
+    # Promotions, located once on the month grid
+    promo_factor = np.ones(n)
+    promoted = np.zeros(n, dtype=bool)
+    promo_label = np.full(n, "", dtype=object)
+    if promotion_details:
+        month_starts = date_range.values
+        promo_dates = np.array([np.datetime64(f"{promo['year']}-{promo['month']:02d}-01") for promo in promotion_details],
+                               dtype=month_starts.dtype)
+        promo_hikes = np.array([promo['hike_percent'] for promo in promotion_details])
+        promo_pos = np.searchsorted(month_starts, promo_dates)
+
+        # Drop promotions outside the projection; only the first one listed for a month is applied
+        in_range = promo_pos < n
+        in_range[in_range] = month_starts[promo_pos[in_range]] == promo_dates[in_range]
+        promo_pos, first = np.unique(promo_pos[in_range], return_index=True)
+        promo_hikes = promo_hikes[in_range][first]
+
+        promo_factor[promo_pos] = promo_hikes
+        promoted[promo_pos] = True
+        promo_label[promo_pos] = [f"Promotion: Basic +{int((hike-1)*100)}%" for hike in promo_hikes]
+
+    # Annual increment is skipped in a promotion month
+    incremented = (months == increment_month) & ~promoted
+    first_year_increment = np.flatnonzero(incremented & (years == first_year))
+
+    jan = months == 1
+    pc_2030 = jan & (years == 2030)
+    pc_2040 = jan & (years == 2040)
+
+    # Basic pay is the running product of all monthly multipliers
+    basic_mult = promo_factor.copy()
+    basic_mult[incremented] *= 1.03
+    basic_mult[pc_2030] *= pc_2030_factor * (1.03 ** 3)
+    basic_mult[pc_2040] *= pc_2040_factor * (1.03 ** 3)
+    basic = current_basic * np.cumprod(basic_mult)
+
+    # DA % of basic: January revisions add to it, pay commissions reset it,
+    # and the first-year increment re-bases it as (DA + 4% of old basic) / new basic
+    da_step = np.zeros(n)
+    da_step[jan & (years < 2030)] = 0.04
+    da_step[jan & (years >= 2031) & (years <= 2039)] = 0.02
+    da_step[jan & (years >= 2041)] = 0.01
+    da_pct = current_da_percentage + np.cumsum(da_step)
+    anchors = sorted([(k, False) for k in first_year_increment] +
+                     [(k, True) for k in np.flatnonzero(pc_2030 | pc_2040)])
+    for k, is_reset in anchors:
+        if is_reset:
+            start = 0.0
         else:
-            # For April, the opening balance already includes March interest
-            if month == 4:
-                df.loc[df.index[i], 'Own_Closing_Balance'] = (df.loc[df.index[i], 'Own_Opening_Balance'] +
-                                                            df.loc[df.index[i], 'Own_Contribution'])
-                
-                df.loc[df.index[i], 'Company_Closing_Balance'] = (df.loc[df.index[i], 'Company_Opening_Balance'] +
-                                                                df.loc[df.index[i], 'Company_Contribution'])
-                
-                df.loc[df.index[i], 'EPFO_Closing_Balance'] = (df.loc[df.index[i], 'EPFO_Opening_Balance'] +
-                                                             df.loc[df.index[i], 'EPFO_Outflow_Contribution'])
-            else:
-                # Normal month calculation
-                df.loc[df.index[i], 'Own_Closing_Balance'] = (df.loc[df.index[i], 'Own_Opening_Balance'] +
-                                                            df.loc[df.index[i], 'Own_Contribution'] +
-                                                            df.loc[df.index[i], 'Own_Monthly_Interest'])
-                
-                df.loc[df.index[i], 'Company_Closing_Balance'] = (df.loc[df.index[i], 'Company_Opening_Balance'] +
-                                                                df.loc[df.index[i], 'Company_Contribution'] +
-                                                                df.loc[df.index[i], 'Company_Monthly_Interest'])
-                
-                df.loc[df.index[i], 'EPFO_Closing_Balance'] = (df.loc[df.index[i], 'EPFO_Opening_Balance'] +
-                                                             df.loc[df.index[i], 'EPFO_Outflow_Contribution'] +
-                                                             df.loc[df.index[i], 'EPFO_Monthly_Interest'])
+            start = ((da_pct[k-1] if k > 0 else current_da_percentage) + 0.04) / 1.03
+        da_pct[k:] = start + np.cumsum(da_step[k:])
 
-        df.loc[df.index[i], 'Total_Corpus'] = df.loc[df.index[i], 'Own_Closing_Balance'] + df.loc[df.index[i], 'Company_Closing_Balance']
-                                             
+    # DA keeps the entered amount until the first month that revises it
+    da_revised = np.logical_or.accumulate(promoted | incremented | jan)
+    da = np.where(da_revised, basic * da_pct, current_da)
+
+    # PF Pay and contributions
+    pf_pay = basic + da
+    own_contrib = pf_pay * (own_pf_percent / 100)
+    company_contrib = pf_pay * (company_pf_percent / 100)
+
+    # EPFO Outflow Contribution: 8.33% of PF Pay, plus 1.16% of the excess less 1250 above 15000
+    epfo_contrib = np.where(pf_pay <= 15000,
+                            pf_pay * 0.0833,
+                            (pf_pay * 0.0833) + ((pf_pay - 15000) * 0.0116) - 1250)
+
+    # Events: previous FY interest is marked on April (from the second April
+    # onwards) unless a promotion replaces it; the rest are joined in order
+    prev_fy_credit = (months == 4) & ~promoted
+    prev_fy_credit[:2] = False
+    jan_labels = np.select(
+        [years < 2030, years == 2030, years <= 2039, years == 2040],
+        ["Annual DA Revision (4% of Basic)", "Pay Commission 2030, DA Reset",
+         "Annual DA Revision (2% of Basic)", "Pay Commission 2040, DA Reset"],
+        "Annual DA Revision (1% of Basic)")
+    event_parts = [
+        np.where(prev_fy_credit, "Previous FY Interest Credited", ""),
+        promo_label,
+        np.where(incremented, "Annual 3% Increment", ""),
+        np.where(jan, jan_labels, ""),
+    ]
+    events = [" ".join(part for part in parts if part) for parts in zip(*event_parts)]
+
+    # Interest is shown every month except March (and the first month) but is
+    # not added to the closing balance in March or April, so
+    # close[i] = close[i-1] * growth[i] + contrib[i], solved with cumulative products/sums
+    shows_interest = months != 3
+    shows_interest[0] = False
+    growth = np.where((months == 3) | (months == 4), 1.0, 1 + monthly_interest_rate)
+    growth[0] = 1.0
+    accumulated = np.cumprod(growth)
+
+    def carry_balance(opening_balance, contrib):
+        closing = accumulated * (opening_balance + np.cumsum(contrib / accumulated))
+        opening = np.concatenate(([opening_balance], closing[:-1]))
+        interest = np.where(shows_interest, opening * monthly_interest_rate, 0.0)
+        return opening, interest, closing
+
+    own_open, own_interest, own_close = carry_balance(current_own_pf, own_contrib)
+    company_open, company_interest, company_close = carry_balance(current_company_pf, company_contrib)
+    epfo_open, epfo_interest, epfo_close = carry_balance(current_epfo_balance, epfo_contrib)
+    total_corpus = own_close + company_close
+
+    # Keep all numeric columns in one float64 block (in NUMERIC_COLS order)
+    values = np.column_stack([
+        basic, da, pf_pay, own_contrib, company_contrib, epfo_contrib,
+        own_open, own_interest, own_close,
+        company_open, company_interest, company_close,
+        epfo_open, epfo_interest, epfo_close,
+        total_corpus,
+    ])
 
     # Round all values
-    numeric_cols = ['Basic', 'DA', 'PF_Pay', 'Own_Contribution', 'Company_Contribution',
-                   'EPFO_Outflow_Contribution', 'Own_Opening_Balance', 'Own_Monthly_Interest', 
-                   'Own_Closing_Balance', 'Company_Opening_Balance', 'Company_Monthly_Interest', 
-                   'Company_Closing_Balance', 'EPFO_Opening_Balance', 'EPFO_Monthly_Interest',
-                   'EPFO_Closing_Balance', 'Total_Corpus']
-    df[numeric_cols] = df[numeric_cols].round(2)
+    np.round(values, 2, out=values)
+    df = pd.DataFrame(values, columns=NUMERIC_COLS, index=date_range)
+
+    # Labels such as "Oct-2026" and "2026-27" from the month/year arrays
+    year_str = years.astype(str)
+    month_abbr = np.array(calendar.month_abbr[1:])
+    next_year_str = np.char.zfill(((years + 1) % 100).astype(str), 2)
+
+    df.insert(0, 'Month_Year', np.char.add(np.char.add(month_abbr[months - 1], '-'), year_str))
+    df['Event'] = events
+    # Flag event rows once here so the views don't re-run string kernels on every rerun
+    df['Has_Event'] = prev_fy_credit | (promo_label != "") | incremented | jan
+    # Pay Commission months are the only PC/DA events the projection emits (there is no "DA Hike" label)
+    df['Is_PC_Or_DA'] = pc_2030 | pc_2040
+    df['Financial_Year'] = np.char.add(np.char.add(year_str, '-'), next_year_str)
 
     return df
 
 
 
-def create_downloadable_excel(df):
-    """Generate a link to download the dataframe as an Excel file"""
+def build_excel_bytes(df):
+    """Build the projection Excel workbook with money formatting and return its bytes
+    
+    Not cached itself: the ledger download memoizes the bytes in get_excel_data, keyed on projection_id.
+    """
     # Create a copy of the dataframe to avoid modifying the original
     export_df = df.copy()
     
     # Apply rounding to specific columns
-    columns_to_round = ['Basic', 'DA', 'PF_Pay', 'Own_Contribution', 'Company_Contribution']
-    for col in columns_to_round:
-        if col in export_df.columns:
-            export_df[col] = export_df[col].apply(round_up_to_10)
+    columns_to_round = ['Basic', 'DA', 'PF_Pay', 'Own_Contribution', 'Company_Contribution', 'EPFO_Outflow_Contribution']
+    round_columns_up_to_10(export_df, columns_to_round)
     
-    output = io.BytesIO()
-    writer = pd.ExcelWriter(output, engine='xlsxwriter')
-    export_df.to_excel(writer, sheet_name='PF_Projection', index=False)
+    # Positions of the money columns, resolved once before formatting
+    money_col_idx = [col_num for col_num, col in enumerate(export_df.columns) if col in MONEY_COLS]
     
-    # Add formatting
-    workbook = writer.book
-    worksheet = writer.sheets['PF_Projection']
+    # Write rows straight to xlsxwriter and assemble the file in memory, with no temp files.
+    # xlsxwriter turns constant_memory off in in_memory mode; the sheet is only a few hundred rows
+    import xlsxwriter
+    
+    output = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+    worksheet = workbook.add_worksheet('PF_Projection')
     
     # Add currency format
     money_fmt = workbook.add_format({'num_format': '₹#,##0'})  # Changed to 0 decimal places
+    header_fmt = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
     
-    # Updated list of columns to include EPFO columns
-    money_columns = [
-        'Basic', 'DA', 'PF_Pay', 'Own_Contribution', 'Company_Contribution',
-        'EPFO_Outflow_Contribution', 'Own_Opening_Balance', 'Own_Monthly_Interest', 
-        'Own_Closing_Balance', 'Company_Opening_Balance', 'Company_Monthly_Interest', 
-        'Company_Closing_Balance', 'EPFO_Opening_Balance', 'EPFO_Monthly_Interest',
-        'EPFO_Closing_Balance', 'Total_Corpus'
-    ]
+    for col_num in money_col_idx:
+        worksheet.set_column(col_num, col_num, 18, money_fmt)
     
-    for col_num, col in enumerate(export_df.columns):
-        if col in money_columns:
-            worksheet.set_column(col_num, col_num, 18, money_fmt)
+    worksheet.write_row(0, 0, export_df.columns.tolist(), header_fmt)
+    for row_num, row in enumerate(export_df.to_numpy(dtype=object), start=1):
+        worksheet.write_row(row_num, 0, row)
     
-    writer.close()
+    workbook.close()
     
-    output.seek(0)
-    excel_data = output.read()
-    b64 = base64.b64encode(excel_data).decode()
-    return f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="PF_Projection.xlsx" class="download-button">Download Excel</a>'
-
+    return output.getvalue()
 
 
 
-def create_downloadable_pdf(df, dob, final_row):
-    """Generate a PDF report of the retirement projection"""
+@st.cache_data(show_spinner=False, max_entries=16)
+def create_downloadable_pdf(dob, generated_on, projection_id):
+    """
+    Generate a PDF report of the retirement projection
+    
+    The projection is read from session state; projection_id identifies it in the cache key.
+    generated_on is the report date printed in the footer, passed in so it is part of the key.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+    
+    df = st.session_state.projection_df
+    final_row = df.iloc[-1]
     buffer = io.BytesIO()
     
-    # Setup PDF with matplotlib - use constrained_layout to prevent overlap
-    plt.figure(figsize=(11.7, 8.27), constrained_layout=True)  # A4 size
+    # Group by calendar year once and reuse it for all yearly plots
+    yearly_groups = df.groupby(df.index.year.values, sort=False)
+
+    # A private A4 figure per call; constrained_layout prevents overlap between the report panels
+    fig = Figure(figsize=(11.7, 8.27), constrained_layout=True)  # A4 size
     
     # Title and header information
-    plt.suptitle('PF Retirement Corpus Projection Report', fontsize=16, fontweight='bold')
+    fig.suptitle('PF Retirement Corpus Projection Report', fontsize=16, fontweight='bold')
     
     # Create gridspec for better layout control
-    gs = plt.GridSpec(4, 3, figure=plt.gcf(), height_ratios=[0.5, 2, 2, 2])
+    gs = fig.add_gridspec(4, 3, height_ratios=[0.5, 2, 2, 2])
     
     # Summary Information
-    ax0 = plt.subplot(gs[0, :])
+    ax0 = fig.add_subplot(gs[0, :])
     ax0.axis('off')
     
     retirement_date = date(dob.year + 60, dob.month, dob.day)
@@ -447,8 +421,8 @@ def create_downloadable_pdf(df, dob, final_row):
     ax0.text(0.1, 0.5, summary_text, fontsize=10, va='center')
     
     # Plot corpus growth
-    ax1 = plt.subplot(gs[1, :])
-    yearly_data = df.resample('Y').last()
+    ax1 = fig.add_subplot(gs[1, :])
+    yearly_data = yearly_groups.last()
     yearly_data.plot(y=['Own_Closing_Balance', 'Company_Closing_Balance', 'Total_Corpus'], 
                     ax=ax1, style=['-', '-', '-'], 
                     color=['blue', 'green', 'red'])
@@ -465,53 +439,53 @@ def create_downloadable_pdf(df, dob, final_row):
             return f'₹{x/100000:.1f}L'
         else:
             return f'₹{x:.0f}'
-    ax1.yaxis.set_major_formatter(plt.FuncFormatter(format_amount))
+    ax1.yaxis.set_major_formatter(FuncFormatter(format_amount))
     
     # Plot annual contribution and interest
-    ax2 = plt.subplot(gs[2, 0])
-    annual_contrib = df.resample('Y').sum()[['Own_Contribution', 'Company_Contribution']]
+    ax2 = fig.add_subplot(gs[2, 0])
+    annual_contrib = yearly_groups[['Own_Contribution', 'Company_Contribution']].sum()
     annual_contrib.plot(kind='bar', ax=ax2, width=0.8)
     ax2.set_title('Annual Contributions', pad=15)
     ax2.set_ylabel('Amount (₹)')
-    ax2.set_xticklabels([x.year for x in annual_contrib.index], rotation=45)
+    ax2.set_xticklabels(annual_contrib.index, rotation=45)
     ax2.legend(['Own', 'Company'])
     
-    ax3 = plt.subplot(gs[2, 1])
-    annual_interest = df.resample('Y').sum()[['Own_Monthly_Interest', 'Company_Monthly_Interest']]
+    ax3 = fig.add_subplot(gs[2, 1])
+    annual_interest = yearly_groups[['Own_Monthly_Interest', 'Company_Monthly_Interest']].sum()
     annual_interest.plot(kind='bar', ax=ax3, width=0.8)
     ax3.set_title('Annual Interest Earned', pad=15)
     ax3.set_ylabel('Amount (₹)')
-    ax3.set_xticklabels([x.year for x in annual_interest.index], rotation=45)
+    ax3.set_xticklabels(annual_interest.index, rotation=45)
     ax3.legend(['Own', 'Company'])
     
     # Plot PF Pay growth
-    ax4 = plt.subplot(gs[2, 2])
+    ax4 = fig.add_subplot(gs[2, 2])
     yearly_data['PF_Pay'].plot(ax=ax4, marker='o', color='purple')
     ax4.set_title('PF Pay Growth', pad=15)
     ax4.set_ylabel('Amount (₹)')
     ax4.grid(True)
     
     # Key milestones table
-    ax5 = plt.subplot(gs[3, :])
+    ax5 = fig.add_subplot(gs[3, :])
     ax5.axis('off')
     
-    milestones = df[df['Event'].str.len() > 0].copy()
+    milestones = df[df['Has_Event']].copy()
     if len(milestones) > 10:
         milestones = milestones.iloc[::len(milestones)//10 + 1]  # Sample key events
     
     milestone_text = 'Key Financial Milestones:\n\n'
-    for idx, row in milestones.iterrows():
-        milestone_text += f"• {row['Month_Year']}: {row['Event']} - PF Pay: ₹{row['PF_Pay']:,.2f}, Corpus: ₹{row['Total_Corpus']:,.2f}\n"
+    for month_year, event, pf_pay, corpus in zip(milestones['Month_Year'].values, milestones['Event'].values,
+                                                 milestones['PF_Pay'].values, milestones['Total_Corpus'].values):
+        milestone_text += f"• {month_year}: {event} - PF Pay: ₹{pf_pay:,.2f}, Corpus: ₹{corpus:,.2f}\n"
     
     ax5.text(0.05, 0.5, milestone_text, fontsize=9, va='center')
     
     # Add footer
-    plt.figtext(0.5, 0.01, f"Report generated on {datetime.now().strftime('%d-%m-%Y %H:%M:%S')}", 
-               ha='center', fontsize=8)
+    fig.text(0.5, 0.01, f"Report generated on {generated_on.strftime('%d-%m-%Y')}", 
+             ha='center', fontsize=8)
     
     # Save figure to PDF
-    plt.savefig(buffer, format='pdf', bbox_inches='tight')
-    plt.close()
+    fig.savefig(buffer, format='pdf', bbox_inches='tight')
     
     buffer.seek(0)
     pdf_data = buffer.read()
@@ -521,47 +495,16 @@ def create_downloadable_pdf(df, dob, final_row):
 
 def convert_to_excel(df):
     """Convert dataframe to Excel with rounding"""
-    # Create a copy of the dataframe to avoid modifying the original
-    export_df = df.copy()
+    export_df = df
     
     # Make sure all EPFO columns are included
     # If the display columns didn't include EPFO columns, we need to add them back from the original dataframe
     epfo_columns = ['EPFO_Outflow_Contribution', 'EPFO_Opening_Balance', 'EPFO_Monthly_Interest', 'EPFO_Closing_Balance']
     for col in epfo_columns:
         if col not in export_df.columns and col in projection_df.columns:
-            export_df[col] = projection_df[col]
-    
-    # Apply rounding to specific columns
-    columns_to_round = ['Basic', 'DA', 'PF_Pay', 'Own_Contribution', 'Company_Contribution', 'EPFO_Outflow_Contribution']
-    for col in columns_to_round:
-        if col in export_df.columns:
-            export_df[col] = export_df[col].apply(round_up_to_10)
+            export_df = export_df.assign(**{col: projection_df[col]})
     
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        export_df.to_excel(writer, index=False, sheet_name='PF_Projection')
-        
-        # Add formatting
-        workbook = writer.book
-        worksheet = writer.sheets['PF_Projection']
-        
-        # Add currency format
-        money_fmt = workbook.add_format({'num_format': '₹#,##0'})  # Changed to 0 decimal places
-        
-        # Include EPFO columns in the formatting
-        money_columns = [
-            'Basic', 'DA', 'PF_Pay', 'Own_Contribution', 'Company_Contribution',
-            'EPFO_Outflow_Contribution', 'Own_Opening_Balance', 'Own_Monthly_Interest', 
-            'Own_Closing_Balance', 'Company_Opening_Balance', 'Company_Monthly_Interest', 
-            'Company_Closing_Balance', 'EPFO_Opening_Balance', 'EPFO_Monthly_Interest',
-            'EPFO_Closing_Balance', 'Total_Corpus'
-        ]
-        
-        for col_num, col in enumerate(export_df.columns):
-            if col in money_columns:
-                worksheet.set_column(col_num, col_num, 18, money_fmt)
-                    
-    return output.getvalue()
+    return build_excel_bytes(export_df)
 def display_monthly_ledger(projection_df):
     """Display monthly PF ledger with filtering options"""
     st.subheader("Month-wise PF Ledger")
@@ -587,6 +530,9 @@ def display_monthly_ledger(projection_df):
     </style>
     """, unsafe_allow_html=True)
     
+    # Calendar year of every row, shared by the year slider and the filter mask
+    row_years = projection_df.index.year.to_numpy()
+    
     # Add filters
     col1, col2, col3 = st.columns(3)
     
@@ -598,48 +544,33 @@ def display_monthly_ledger(projection_df):
         event_filter = st.checkbox("Show only months with events", value=False)
     
     with col3:
-        min_year = projection_df.index.min().year
-        max_year = projection_df.index.max().year
+        min_year = int(row_years.min())
+        max_year = int(row_years.max())
         year_range = st.slider("Year Range", min_year, max_year, (min_year, max_year))
     
-    # Apply filters
-    filtered_df = projection_df.copy()
+    # Apply filters as one combined mask
+    mask = (row_years >= year_range[0]) & (row_years <= year_range[1])
     if selected_year != "All Years":
-        filtered_df = filtered_df[filtered_df['Financial_Year'] == selected_year]
+        mask &= projection_df['Financial_Year'].to_numpy() == selected_year
     if event_filter:
-        filtered_df = filtered_df[filtered_df['Event'].str.len() > 0]
-    filtered_df = filtered_df[(filtered_df.index.year >= year_range[0]) & 
-                            (filtered_df.index.year <= year_range[1])]
-    
-    # Display columns - keep only what's needed for display
-    display_cols = ['Month_Year', 'Basic', 'DA', 'PF_Pay', 'Own_Contribution',
-                  'Company_Contribution', 'Own_Opening_Balance', 'Own_Monthly_Interest',
-                  'Own_Closing_Balance', 'Company_Opening_Balance', 'Company_Monthly_Interest',
-                  'Company_Closing_Balance', 'Total_Corpus', 'Event']
+        mask &= projection_df['Has_Event'].to_numpy()
+    filtered_df = projection_df.loc[mask, DISPLAY_COLS]
     
     if not filtered_df.empty:
+        # filtered_df already holds just the display columns; size the table once
+        table_height = min(600, 35 + 35 * len(filtered_df))
+        
         # Create a container to force rendering
         table_container = st.container()
         
         with table_container:
-            # Method 1: Try basic dataframe with formatting
+            # Method 1: Try dataframe with currency formatting done client-side
             try:
+                money_format = st.column_config.NumberColumn(format='₹%.2f')
                 st.dataframe(
-                    filtered_df[display_cols].style.format({
-                        'Basic': '₹{:,.2f}',
-                        'DA': '₹{:,.2f}',
-                        'PF_Pay': '₹{:,.2f}',
-                        'Own_Contribution': '₹{:,.2f}',
-                        'Company_Contribution': '₹{:,.2f}',
-                        'Own_Opening_Balance': '₹{:,.2f}',
-                        'Own_Monthly_Interest': '₹{:,.2f}',
-                        'Own_Closing_Balance': '₹{:,.2f}',
-                        'Company_Opening_Balance': '₹{:,.2f}',
-                        'Company_Monthly_Interest': '₹{:,.2f}',
-                        'Company_Closing_Balance': '₹{:,.2f}',
-                        'Total_Corpus': '₹{:,.2f}'
-                    }),
-                    height=min(600, 35 + 35 * len(filtered_df)),
+                    filtered_df,
+                    column_config={col: money_format for col in DISPLAY_COLS if col in MONEY_COLS},
+                    height=table_height,
                     width=1200,
                     use_container_width=True
                 )
@@ -647,46 +578,43 @@ def display_monthly_ledger(projection_df):
                 # Method 2: Fallback to unstyled dataframe
                 try:
                     st.dataframe(
-                        filtered_df[display_cols],
-                        height=min(600, 35 + 35 * len(filtered_df)),
+                        filtered_df,
+                        height=table_height,
                         width=1200
                     )
                 except:
                     # Method 3: Ultimate fallback - HTML table
                     st.markdown(
-                        filtered_df[display_cols].to_html(escape=False, float_format=lambda x: f'₹{x:,.2f}'),
+                        filtered_df.to_html(escape=False, float_format=lambda x: f'₹{x:,.2f}'),
                         unsafe_allow_html=True
                     )
         
         # Download button with EPFO columns
-        @st.cache_data
-        def get_excel_data(df):
-            # Create a copy that includes all columns from the original projection_df
-            # This ensures EPFO columns are included in the Excel file
-            full_df = projection_df.copy()
+        # Cached on the projection id and filter values, so Streamlit never has to hash a DataFrame
+        # The only cache on the download path (build_excel_bytes is uncached), keyed on scalars.
+        # Bounded: every Calculate click creates a new projection_id, so old entries are never hit again
+        @st.cache_data(show_spinner=False, max_entries=32)
+        def get_excel_data(projection_id, selected_year, event_filter, year_range):
+            # Start from the full projection_df so EPFO columns are included in the Excel file;
+            # the filters and the final column selection below return new frames, so no copy is needed
+            full_df = projection_df
             
             # Filter to match the current view
             if selected_year != "All Years":
                 full_df = full_df[full_df['Financial_Year'] == selected_year]
             if event_filter:
-                full_df = full_df[full_df['Event'].str.len() > 0]
+                full_df = full_df[full_df['Has_Event']]
             full_df = full_df[(full_df.index.year >= year_range[0]) & 
                               (full_df.index.year <= year_range[1])]
             
-            # Make sure all columns are included for Excel
-            all_cols = display_cols + ['EPFO_Outflow_Contribution', 'EPFO_Opening_Balance', 
-                                      'EPFO_Monthly_Interest', 'EPFO_Closing_Balance']
-            # Remove duplicates while preserving order
-            all_cols = list(dict.fromkeys(all_cols))
-            
             # Filter columns that exist in the dataframe
-            excel_cols = [col for col in all_cols if col in full_df.columns]
+            excel_cols = [col for col in _EXCEL_COL_ORDER if col in full_df.columns]
             
             return convert_to_excel(full_df[excel_cols])
         
         st.download_button(
             label="📥 Download Excel",
-            data=get_excel_data(filtered_df),
+            data=get_excel_data(st.session_state.projection_id, selected_year, event_filter, tuple(year_range)),
             file_name="PF_Projection.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
@@ -695,60 +623,19 @@ def display_monthly_ledger(projection_df):
 
 def create_downloadable_excel(df):
     """Generate a link to download the dataframe as an Excel file"""
-    # Create a copy of the dataframe to avoid modifying the original
-    export_df = df.copy()
-    
-    # Make sure all EPFO columns are included
-    epfo_columns = ['EPFO_Outflow_Contribution', 'EPFO_Opening_Balance', 'EPFO_Monthly_Interest', 'EPFO_Closing_Balance']
-    for col in epfo_columns:
-        if col not in export_df.columns and col in df.columns:
-            export_df[col] = df[col]
-    
-    # Apply rounding to specific columns
-    columns_to_round = ['Basic', 'DA', 'PF_Pay', 'Own_Contribution', 'Company_Contribution', 'EPFO_Outflow_Contribution']
-    for col in columns_to_round:
-        if col in export_df.columns:
-            export_df[col] = export_df[col].apply(round_up_to_10)
-    
-    output = io.BytesIO()
-    writer = pd.ExcelWriter(output, engine='xlsxwriter')
-    export_df.to_excel(writer, sheet_name='PF_Projection', index=False)
-    
-    # Add formatting
-    workbook = writer.book
-    worksheet = writer.sheets['PF_Projection']
-    
-    # Add currency format
-    money_fmt = workbook.add_format({'num_format': '₹#,##0'})  # Changed to 0 decimal places
-    
-    # Updated list of columns to include EPFO columns
-    money_columns = [
-        'Basic', 'DA', 'PF_Pay', 'Own_Contribution', 'Company_Contribution',
-        'EPFO_Outflow_Contribution', 'Own_Opening_Balance', 'Own_Monthly_Interest', 
-        'Own_Closing_Balance', 'Company_Opening_Balance', 'Company_Monthly_Interest', 
-        'Company_Closing_Balance', 'EPFO_Opening_Balance', 'EPFO_Monthly_Interest',
-        'EPFO_Closing_Balance', 'Total_Corpus'
-    ]
-    
-    for col_num, col in enumerate(export_df.columns):
-        if col in money_columns:
-            worksheet.set_column(col_num, col_num, 18, money_fmt)
-    
-    writer.close()
-    
-    output.seek(0)
-    excel_data = output.read()
-    b64 = base64.b64encode(excel_data).decode()
+    b64 = base64.b64encode(build_excel_bytes(df)).decode()
     return f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="PF_Projection.xlsx" class="download-button">Download Excel</a>'
 
 
-def calculate_epfo_pension(dob, date_of_joining, highest_pf_pay_aug2014, projection_df):
-    """
-    Calculate EPFO higher pension based on the formula:
-    [(Service Days + 2 bonus years if service >20yrs) × Highest PF Pay Till August 2014) + 
-     (Days After August 2014 × Average monthly PF Pay of last 60 months till age 58)] 
-     / (70 × 365)
-    """
+PensionDates = namedtuple('PensionDates', [
+    'age_58_date', 'total_service_years', 'service_days_till_aug2014', 'bonus_days',
+    'adjusted_service_days', 'days_after_aug2014', 'last_60_months_start',
+])
+
+
+@lru_cache(maxsize=32)
+def _pension_dates(dob, date_of_joining):
+    """Date arithmetic for the EPFO pension, which depends only on DOB and joining date"""
     # Calculate key dates
     age_58_date = dob + relativedelta(years=58)
     # Make sure we go to the end of the month for age 58
@@ -760,30 +647,51 @@ def calculate_epfo_pension(dob, date_of_joining, highest_pf_pay_aug2014, project
     # --- Calculate Total Service Years (from joining to retirement at 58) ---
     total_service_days = (age_58_date - date_of_joining).days
     total_service_years = total_service_days / 365.25  # Accurate year count including leap years
-    print(f"Total service years from joining to age 58: {total_service_years:.2f}")
     
     # Determine if bonus years are applicable (>20 years total service)
     bonus_days = 730 if total_service_years > 20 else 0
-    is_bonus_applied = bonus_days > 0
     
-    # --- First Component: Service Days (with bonus) × Highest PF Pay ---
-    # Service days only till August 2014 for this component
+    # Service days only till August 2014 for the first component
     service_days_till_aug2014 = (aug_2014_end - date_of_joining).days
-    print(f"Service days till Aug 2014: {service_days_till_aug2014}")
     
     # Add bonus days to service days for component 1 calculation
     adjusted_service_days = service_days_till_aug2014 + bonus_days
-    print(f"Adjusted service days (with bonus): {adjusted_service_days}")
     
-    component1 = adjusted_service_days * highest_pf_pay_aug2014
+    days_after_aug2014 = (age_58_date - sep_2014_start).days
     
-    # --- Second Component: Days After Aug 2014 × Last 60 Months Avg PF Pay ---
     # Get exact 60-month window (Age 53 to 58)
     last_60_months_start = age_58_date - relativedelta(months=60)
-    last_60_months_df = projection_df[
-        (projection_df.index >= pd.to_datetime(last_60_months_start)) & 
-        (projection_df.index <= pd.to_datetime(age_58_date))
-    ]
+    
+    return PensionDates(age_58_date, total_service_years, service_days_till_aug2014, bonus_days,
+                        adjusted_service_days, days_after_aug2014, last_60_months_start)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def calculate_epfo_pension(dob, date_of_joining, highest_pf_pay_aug2014, projection_id):
+    """
+    Calculate EPFO higher pension based on the formula:
+    [(Service Days + 2 bonus years if service >20yrs) × Highest PF Pay Till August 2014) + 
+     (Days After August 2014 × Average monthly PF Pay of last 60 months till age 58)] 
+     / (70 × 365)
+    
+    The projection is read from session state; projection_id identifies it in the cache key,
+    so the cache is bounded with max_entries as old ids are never hit again.
+    """
+    projection_df = st.session_state.projection_df
+    
+    dates = _pension_dates(dob, date_of_joining)
+    age_58_date = dates.age_58_date
+    service_days_till_aug2014 = dates.service_days_till_aug2014
+    bonus_days = dates.bonus_days
+    adjusted_service_days = dates.adjusted_service_days
+    last_60_months_start = dates.last_60_months_start
+    
+    # --- First Component: Service Days (with bonus) × Highest PF Pay ---
+    component1 = adjusted_service_days * highest_pf_pay_aug2014
+    
+    # --- Second Component: Days After Aug 2014 × Last 60 Months Avg PF Pay ---
+    # The projection index is sorted by month, so a label slice finds the window by binary search
+    last_60_months_df = projection_df.loc[pd.Timestamp(last_60_months_start):pd.Timestamp(age_58_date)]
     
     # Validate we have full 60 months of data
     if len(last_60_months_df) < 60:
@@ -791,9 +699,8 @@ def calculate_epfo_pension(dob, date_of_joining, highest_pf_pay_aug2014, project
         st.warning(f"Missing {missing_months} months of data for 60-month average (need until {age_58_date.strftime('%d-%b-%Y')})")
         return None
     
-    avg_pf_pay = last_60_months_df['PF_Pay'].mean()
-    days_after_aug2014 = (age_58_date - sep_2014_start).days
-    print("Days after 2014-",days_after_aug2014)
+    avg_pf_pay = float(last_60_months_df['PF_Pay'].to_numpy().mean())  # PF_Pay has no NaNs
+    days_after_aug2014 = dates.days_after_aug2014
     component2 = days_after_aug2014 * avg_pf_pay
     
     # --- Final Calculation ---
@@ -811,120 +718,173 @@ def calculate_epfo_pension(dob, date_of_joining, highest_pf_pay_aug2014, project
         'monthly_pension': monthly_pension,
         'age_58_date': age_58_date,
         'last_60_months_start': last_60_months_start,
-        'total_service_years': total_service_years,  # Total service from joining to age 58
-        'is_bonus_applied': is_bonus_applied
+        'total_service_years': dates.total_service_years,  # Total service from joining to age 58
+        'is_bonus_applied': bonus_days > 0
     }   
     
     
 
+def format_amount(x, pos):
+    """Axis tick formatter showing amounts in Crores / Lakhs"""
+    if x >= 10000000:
+        return f'₹{x/10000000:.2f}Cr'
+    elif x >= 100000:
+        return f'₹{x/100000:.2f}L'
+    else:
+        return f'₹{x:.0f}'
+
+
+def figure_to_png(fig):
+    """Render a Figure to PNG bytes, as st.pyplot would"""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight', dpi=200)
+    return buffer.getvalue()
+
+
+# The yearly charts are cached as PNG bytes on their input arrays, so reruns that don't
+# change the projection skip drawing, and no Figure object is shared between sessions
+@st.cache_data(show_spinner=False, max_entries=32)
+def plot_corpus_growth(years, own_balance, company_balance, total_corpus):
+    """Line chart of year-end Own, Company and Total corpus"""
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+    
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.plot(years, own_balance, marker='o', label='Own PF')
+    ax.plot(years, company_balance, marker='s', label='Company PF')
+    ax.plot(years, total_corpus, marker='^', linewidth=2, label='Total Corpus')
+    ax.set_title('Yearly Corpus Growth')
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Amount (₹)')
+    ax.legend()
+    ax.grid(True)
+    ax.yaxis.set_major_formatter(FuncFormatter(format_amount))
+    ax.tick_params(axis='x', labelrotation=45)
+    return figure_to_png(fig)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def plot_contributions(years, own_contribution, company_contribution, own_interest, company_interest):
+    """Bar chart of annual contributions with annual interest on a second axis"""
+    from matplotlib.figure import Figure
+    
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    
+    width = 0.35
+    x = np.arange(len(years))
+    
+    ax.bar(x - width/2, own_contribution, width, label='Own Contribution')
+    ax.bar(x + width/2, company_contribution, width, label='Company Contribution')
+    ax.set_title('Yearly Contributions')
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Amount (₹)')
+    ax.set_xticks(x)
+    ax.set_xticklabels(years, rotation=45)
+    ax.legend()
+    
+    ax2 = ax.twinx()
+    ax2.plot(x, own_interest, 'r-', marker='o', label='Own Interest')
+    ax2.plot(x, company_interest, 'g-', marker='s', label='Company Interest')
+    ax2.set_ylabel('Interest Amount (₹)')
+    ax2.legend(loc='upper right')
+    return figure_to_png(fig)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def plot_pf_pay_growth(years, pf_pay, event_years, events, event_pf_pay):
+    """Line chart of year-end PF Pay with Pay Commission events annotated"""
+    from matplotlib.figure import Figure
+    
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.plot(years, pf_pay, marker='o', linewidth=2)
+    
+    # Annotate Pay Commission events (already filtered to one per year)
+    for i in range(len(event_years)):
+        ax.annotate(events[i], 
+                   xy=(event_years[i], event_pf_pay[i]),
+                   xytext=(15, 15),
+                   textcoords='offset points',
+                   arrowprops=dict(arrowstyle='->', color='red'),
+                   fontsize=8,
+                   color='red')
+    
+    ax.set_title('PF Pay Growth Over Time')
+    ax.set_xlabel('Year')
+    ax.set_ylabel('PF Pay Amount (₹)')
+    ax.grid(True)
+    return figure_to_png(fig)
+
+
 def display_yearly_summary(projection_df):
     """Display yearly summary of PF growth"""
     st.subheader("Yearly Summary")
     
-    # Create yearly summary
-    yearly_df = projection_df.resample('Y').last()
-    yearly_df['Year'] = yearly_df.index.year
-    yearly_df['Annual_Own_Contribution'] = projection_df.resample('Y').sum()['Own_Contribution']
-    yearly_df['Annual_Company_Contribution'] = projection_df.resample('Y').sum()['Company_Contribution']
-    yearly_df['Annual_Own_Interest'] = projection_df.resample('Y').sum()['Own_Monthly_Interest']
-    yearly_df['Annual_Company_Interest'] = projection_df.resample('Y').sum()['Company_Monthly_Interest']
+    # Create yearly summary: year-end balances and annual totals in one aggregation
+    agg_map = {
+        'PF_Pay': 'last',
+        'Own_Closing_Balance': 'last',
+        'Company_Closing_Balance': 'last',
+        'Total_Corpus': 'last',
+        'Own_Contribution': 'sum',
+        'Company_Contribution': 'sum',
+        'Own_Monthly_Interest': 'sum',
+        'Company_Monthly_Interest': 'sum',
+    }
+    yearly_df = projection_df.groupby(projection_df.index.year).agg(agg_map).rename(columns={
+        'Own_Contribution': 'Annual_Own_Contribution',
+        'Company_Contribution': 'Annual_Company_Contribution',
+        'Own_Monthly_Interest': 'Annual_Own_Interest',
+        'Company_Monthly_Interest': 'Annual_Company_Interest',
+    })
+    yearly_df['Year'] = yearly_df.index
     
     # Display columns
     display_cols = ['Year', 'PF_Pay', 'Annual_Own_Contribution', 'Annual_Company_Contribution',
                    'Annual_Own_Interest', 'Annual_Company_Interest', 'Own_Closing_Balance',
                    'Company_Closing_Balance', 'Total_Corpus']
     
-    # Format the display
-    styled_df = yearly_df[display_cols].style.format({
-        'PF_Pay': '₹{:,.2f}',
-        'Annual_Own_Contribution': '₹{:,.2f}',
-        'Annual_Company_Contribution': '₹{:,.2f}',
-        'Annual_Own_Interest': '₹{:,.2f}',
-        'Annual_Company_Interest': '₹{:,.2f}',
-        'Own_Closing_Balance': '₹{:,.2f}',
-        'Company_Closing_Balance': '₹{:,.2f}',
-        'Total_Corpus': '₹{:,.2f}'
-    }).background_gradient(subset=['Total_Corpus'], cmap='Blues')
-    
-    st.dataframe(styled_df, height=300)
+    # Format the display client-side instead of styling every cell in Python
+    money_format = st.column_config.NumberColumn(format='₹%.2f')
+    st.dataframe(
+        yearly_df[display_cols],
+        column_config={col: money_format for col in display_cols if col != 'Year'},
+        height=300
+    )
     
     # Visualize yearly growth
     st.subheader("Corpus Growth Visualization")
     
     tab1, tab2, tab3 = st.tabs(["Total Corpus Growth", "Contributions & Interest", "PF Pay Growth"])
+    years = yearly_df.index.to_numpy()
     
     with tab1:
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.plot(yearly_df.index, yearly_df['Own_Closing_Balance'], marker='o', label='Own PF')
-        ax.plot(yearly_df.index, yearly_df['Company_Closing_Balance'], marker='s', label='Company PF')
-        ax.plot(yearly_df.index, yearly_df['Total_Corpus'], marker='^', linewidth=2, label='Total Corpus')
-        ax.set_title('Yearly Corpus Growth')
-        ax.set_xlabel('Year')
-        ax.set_ylabel('Amount (₹)')
-        ax.legend()
-        ax.grid(True)
-        
-        def format_amount(x, pos):
-            if x >= 10000000:
-                return f'₹{x/10000000:.2f}Cr'
-            elif x >= 100000:
-                return f'₹{x/100000:.2f}L'
-            else:
-                return f'₹{x:.0f}'
-                
-        ax.yaxis.set_major_formatter(plt.FuncFormatter(format_amount))
-        plt.xticks(rotation=45)
-        
-        st.pyplot(fig)
+        corpus_png = plot_corpus_growth(years,
+                                        yearly_df['Own_Closing_Balance'].to_numpy(),
+                                        yearly_df['Company_Closing_Balance'].to_numpy(),
+                                        yearly_df['Total_Corpus'].to_numpy())
+        st.image(corpus_png, use_container_width=True)
     
     with tab2:
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        width = 0.35
-        x = np.arange(len(yearly_df))
-        
-        ax.bar(x - width/2, yearly_df['Annual_Own_Contribution'], width, label='Own Contribution')
-        ax.bar(x + width/2, yearly_df['Annual_Company_Contribution'], width, label='Company Contribution')
-        
-        ax.set_title('Yearly Contributions')
-        ax.set_xlabel('Year')
-        ax.set_ylabel('Amount (₹)')
-        ax.set_xticks(x)
-        ax.set_xticklabels(yearly_df['Year'], rotation=45)
-        ax.legend()
-        
-        ax2 = ax.twinx()
-        ax2.plot(x, yearly_df['Annual_Own_Interest'], 'r-', marker='o', label='Own Interest')
-        ax2.plot(x, yearly_df['Annual_Company_Interest'], 'g-', marker='s', label='Company Interest')
-        ax2.set_ylabel('Interest Amount (₹)')
-        ax2.legend(loc='upper right')
-        
-        st.pyplot(fig)
+        contributions_png = plot_contributions(years,
+                                               yearly_df['Annual_Own_Contribution'].to_numpy(),
+                                               yearly_df['Annual_Company_Contribution'].to_numpy(),
+                                               yearly_df['Annual_Own_Interest'].to_numpy(),
+                                               yearly_df['Annual_Company_Interest'].to_numpy())
+        st.image(contributions_png, use_container_width=True)
     
     with tab3:
-        fig, ax = plt.subplots(figsize=(10, 6))
-        sns.lineplot(x=yearly_df.index, y=yearly_df['PF_Pay'], marker='o', linewidth=2)
-        
-        # Annotate key events - safely handle None values
-        events_df = projection_df[projection_df['Event'].notna() & projection_df['Event'].str.contains('Pay Commission|DA Hike', na=False)]
-        events_df = events_df.resample('Y').first()  # Take first event of each year
-        
-        for idx, row in events_df.iterrows():
-            if row['Event'] and 'Pay Commission' in row['Event']:
-                ax.annotate(row['Event'], 
-                           xy=(idx, row['PF_Pay']),
-                           xytext=(15, 15),
-                           textcoords='offset points',
-                           arrowprops=dict(arrowstyle='->', color='red'),
-                           fontsize=8,
-                           color='red')
-        
-        ax.set_title('PF Pay Growth Over Time')
-        ax.set_xlabel('Year')
-        ax.set_ylabel('PF Pay Amount (₹)')
-        ax.grid(True)
+        # Annotate key events - first Pay Commission event of each year
+        pc_df = projection_df.loc[projection_df['Is_PC_Or_DA']]
+        first_per_year = pc_df.groupby(pc_df.index.year).head(1)
         
-        st.pyplot(fig)
+        pf_pay_png = plot_pf_pay_growth(years, yearly_df['PF_Pay'].to_numpy(),
+                                        first_per_year.index.year.to_numpy(),
+                                        first_per_year['Event'].to_numpy(),
+                                        first_per_year['PF_Pay'].to_numpy())
+        st.image(pf_pay_png, use_container_width=True)
 
 def display_summary_metrics(projection_df, dob):
     if hasattr(st.session_state, 'date_of_joining') and hasattr(st.session_state, 'highest_pf_pay_aug2014'):
@@ -933,7 +893,7 @@ def display_summary_metrics(projection_df, dob):
                 dob=dob,
                 date_of_joining=st.session_state.date_of_joining,
                 highest_pf_pay_aug2014=st.session_state.highest_pf_pay_aug2014,
-                projection_df=projection_df
+                projection_id=st.session_state.projection_id
             )
             
             if pension_result:
@@ -1122,30 +1082,31 @@ def display_summary_metrics(projection_df, dob):
     # Show key events
     st.subheader("Key Financial Events")
     
-    events_df = projection_df[projection_df['Event'].str.len() > 0].copy()
+    events_df = projection_df[projection_df['Has_Event']].copy()
     
     if not events_df.empty:
-        for idx, row in events_df.iterrows():
-            if 'Pay Commission' in row['Event']:
-                with st.expander(f"{row['Month_Year']} - {row['Event']}", expanded=True):
-                    prev_month = idx - pd.DateOffset(months=1)
-                    if prev_month in projection_df.index:
-                        prev_row = projection_df.loc[prev_month]
-                        st.write(f"- PF Pay increased from ₹{prev_row['PF_Pay']:,.2f} to ₹{row['PF_Pay']:,.2f}")
-                        st.write(f"- Basic Pay increased from ₹{prev_row['Basic']:,.2f} to ₹{row['Basic']:,.2f}")
-                        st.write(f"- Monthly contribution increased from ₹{prev_row['Own_Contribution'] + prev_row['Company_Contribution']:,.2f} to ₹{row['Own_Contribution'] + row['Company_Contribution']:,.2f}")
-            elif 'DA Hike' in row['Event']:
-                with st.expander(f"{row['Month_Year']} - {row['Event']}"):
-                    prev_month = idx - pd.DateOffset(months=1)
-                    if prev_month in projection_df.index:
-                        prev_row = projection_df.loc[prev_month]
-                        st.write(f"- DA increased from ₹{prev_row['DA']:,.2f} to ₹{row['DA']:,.2f}")
-                        st.write(f"- PF Pay increased from ₹{prev_row['PF_Pay']:,.2f} to ₹{row['PF_Pay']:,.2f}")
+        # The index is contiguous months, so shifting by one row gives each month's previous month
+        prev_row_df = projection_df[['Basic', 'DA', 'PF_Pay', 'Own_Contribution', 'Company_Contribution']].shift(1)
+        first_month = projection_df.index[0]
+        for row in events_df.itertuples():
+            if 'Pay Commission' in row.Event:
+                with st.expander(f"{row.Month_Year} - {row.Event}", expanded=True):
+                    if row.Index != first_month:
+                        prev_row = prev_row_df.loc[row.Index]
+                        st.write(f"- PF Pay increased from ₹{prev_row['PF_Pay']:,.2f} to ₹{row.PF_Pay:,.2f}")
+                        st.write(f"- Basic Pay increased from ₹{prev_row['Basic']:,.2f} to ₹{row.Basic:,.2f}")
+                        st.write(f"- Monthly contribution increased from ₹{prev_row['Own_Contribution'] + prev_row['Company_Contribution']:,.2f} to ₹{row.Own_Contribution + row.Company_Contribution:,.2f}")
+            elif 'DA Hike' in row.Event:
+                with st.expander(f"{row.Month_Year} - {row.Event}"):
+                    if row.Index != first_month:
+                        prev_row = prev_row_df.loc[row.Index]
+                        st.write(f"- DA increased from ₹{prev_row['DA']:,.2f} to ₹{row.DA:,.2f}")
+                        st.write(f"- PF Pay increased from ₹{prev_row['PF_Pay']:,.2f} to ₹{row.PF_Pay:,.2f}")
     else:
         st.write("No significant financial events found in the projection period.")
         
     # Generate downloadable PDF report
-    st.markdown(create_downloadable_pdf(projection_df, dob, final_row), unsafe_allow_html=True)
+    st.markdown(create_downloadable_pdf(dob, date.today(), st.session_state.projection_id), unsafe_allow_html=True)
 
 # When form is submitted
 if calculate_button:
@@ -1166,11 +1127,14 @@ if calculate_button:
             promotion_details=promotion_details,
             pc_2030_factor=pc_2030_factor,
             pc_2040_factor=pc_2040_factor,
-            current_epfo_balance=current_epfo_balance
+            current_epfo_balance=current_epfo_balance,
+            today=date.today()
         )
         
         if projection_df is not None:
             st.session_state.projection_df = projection_df
+            # New id per calculation; keys the caches that read projection_df (unique across sessions)
+            st.session_state.projection_id = uuid.uuid4().hex
             st.session_state.calculated = True
 
 # Display results if calculation is done